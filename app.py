@@ -10,14 +10,32 @@ Tech Stack: Flask, SQLite, TailwindCSS, Jinja2
 =============================================================================
 """
 
+import hmac
+import json
+import mimetypes
 import os
 import secrets
+import sqlite3
+import tempfile
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
+from pathlib import Path
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import click
+import numpy as np
+from flask import Flask, render_template, request, redirect, url_for, flash, session, g, jsonify
+from flask_caching import Cache
+from flask_migrate import Migrate, stamp, upgrade
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, create_engine, delete, event, func, insert, inspect, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 from PIL import Image
 
@@ -37,10 +55,45 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 # File upload configuration
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Largest non-file form field held in memory (bigger ones are rejected early)
+app.config['MAX_FORM_MEMORY_SIZE'] = 100 * 1024  # 100KB
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp'})
 
-# Initialize database
+# Chunk size used when copying a raw upload body to a temporary file
+UPLOAD_CHUNK_SIZE = 64 * 1024  # 64KB
+
+# Number of cards shown per page on the browse pages
+BROWSE_PAGE_SIZE = 24
+
+# Password check cache - remembers the last few results so repeated login
+# attempts don't re-run the (deliberately slow) hash every time.
+# It lives in process memory only and is cleared on restart.
+PASSWORD_CHECK_CACHE_SIZE = 256
+
+# Cache configuration - in-process cache for data shared by all visitors
+app.config['CACHE_TYPE'] = 'SimpleCache'
+app.config['CACHE_DEFAULT_TIMEOUT'] = 60  # seconds
+
+# Initialize database, migrations and cache
 db = SQLAlchemy(app)
+# Schema changes are applied with Alembic migrations (flask --app app db ...).
+# Batch mode lets Alembic alter SQLite tables by copying them.
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'),
+                  render_as_batch=True)
+cache = Cache(app)
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune new SQLite connections: write-ahead logging and NORMAL sync mean
+    each commit needs fewer fsyncs, while staying crash-safe.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
 
 # =============================================================================
 # DATABASE MODELS
@@ -86,19 +139,65 @@ class User(db.Model):
     
     def check_password(self, password):
         """Verify if the provided password matches the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def _split_column(self, column):
+        """
+        Split a comma-separated column into a list.
+        
+        The list is cached on the instance alongside the string it came from,
+        so repeated calls (templates, compatibility scoring) parse it once.
+        A new value assigned to the column is parsed again.
+        """
+        value = getattr(self, column)
+        cached = self.__dict__.get('_split_' + column)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        items = [item.strip() for item in value.split(',')] if value else []
+        self.__dict__['_split_' + column] = (value, items)
+        return items
     
     def get_lifestyle_list(self):
         """Return lifestyle preferences as a list."""
-        if self.lifestyle:
-            return [tag.strip() for tag in self.lifestyle.split(',')]
-        return []
+        return self._split_column('lifestyle')
     
     def get_locations_list(self):
         """Return preferred locations as a list."""
-        if self.preferred_locations:
-            return [loc.strip() for loc in self.preferred_locations.split(',')]
-        return []
+        return self._split_column('preferred_locations')
+
+
+class Tag(db.Model):
+    """
+    Tag model - one row per distinct lifestyle tag, linked to users through
+    the user_tags table. Names are stored in lowercase (see split_names).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(500), unique=True, nullable=False)
+
+
+class Location(db.Model):
+    """
+    Location model - one row per distinct preferred location, linked to users
+    through the user_locations table. Names are stored in lowercase.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(500), unique=True, nullable=False)
+
+
+# Link tables: which tags/locations each user has. These mirror the
+# comma-separated User.lifestyle and User.preferred_locations columns
+# (kept in step by sync_user_tags) so SQL can count matches directly.
+user_tags = db.Table(
+    'user_tags',
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+)
+
+user_locations = db.Table(
+    'user_locations',
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('location_id', db.Integer, db.ForeignKey('location.id'), primary_key=True),
+)
 
 
 class Listing(db.Model):
@@ -134,6 +233,14 @@ class Listing(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Indexes for the browse listings filters and sort order
+    __table_args__ = (
+        db.Index('ix_listing_active_created', is_active, created_at.desc()),
+        db.Index('ix_listing_rent', rent),
+        db.Index('ix_listing_room_type', room_type),
+        db.Index('ix_listing_location_lower', db.func.lower(location)),
+    )
+    
     def get_amenities_list(self):
         """Return amenities as a list."""
         if self.amenities:
@@ -155,8 +262,9 @@ def allowed_file(filename):
     Returns:
         Boolean indicating if the file type is allowed
     """
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    # rpartition returns ('', '', filename) when there is no dot
+    _, dot, extension = filename.rpartition('.')
+    return bool(dot) and extension.lower() in ALLOWED_EXTENSIONS
 
 
 def save_image(file, prefix='listing'):
@@ -178,17 +286,24 @@ def save_image(file, prefix='listing'):
         
         # Save and optionally resize the image
         try:
-            image = Image.open(file)
+            # Read straight from the uploaded stream (rewound in case it
+            # was already read), so the bytes aren't copied again first
+            file.stream.seek(0)
+            image = Image.open(file.stream)
+            # Convert to RGB if necessary (for JPEG compatibility)
+            if image.mode in ('RGBA', 'P'):
+                image = image.convert('RGB')
+            
             # Resize large images to save space (max 1200px width)
             if image.width > 1200:
                 ratio = 1200 / image.width
                 new_height = int(image.height * ratio)
+                # For JPEGs, let the decoder shrink by 1/2, 1/4 or 1/8 while
+                # decoding (never below the target size), so less is decoded
+                if image.format == 'JPEG':
+                    image.draft('RGB', (1200, new_height))
                 image = image.resize((1200, new_height), Image.Resampling.LANCZOS)
             
-            # Convert to RGB if necessary (for JPEG compatibility)
-            if image.mode in ('RGBA', 'P'):
-                image = image.convert('RGB')
-            
             image.save(filepath, quality=85, optimize=True)
             return unique_name
         except Exception as e:
@@ -197,6 +312,34 @@ def save_image(file, prefix='listing'):
     return None
 
 
+# Recent password check results, keyed by (password_hash, HMAC of password)
+# so plain-text passwords are never stored. Oldest entries are dropped first.
+_password_checks = OrderedDict()
+_password_check_key = secrets.token_bytes(32)
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password against its hash, reusing recent results.
+    
+    Args:
+        password_hash: The stored password hash
+        password: The password to check
+    
+    Returns:
+        Boolean indicating if the password matches the hash
+    """
+    digest = hmac.new(_password_check_key, password.encode(), 'sha256').digest()
+    key = (password_hash, digest)
+    result = _password_checks.get(key)
+    if result is None:
+        result = check_password_hash(password_hash, password)
+        _password_checks[key] = result
+        if len(_password_checks) > PASSWORD_CHECK_CACHE_SIZE:
+            _password_checks.popitem(last=False)
+    return result
+
+
 def login_required(f):
     """
     Decorator to protect routes that require authentication.
@@ -220,15 +363,180 @@ def get_current_user():
     """
     Get the currently logged-in user from the database.
     
+    The user is looked up once per request and kept on flask.g, since both
+    the route and the inject_user context processor ask for it.
+    
     Returns:
         User object if logged in, None otherwise
     """
-    if 'user_id' in session:
-        return User.query.get(session['user_id'])
-    return None
+    user = getattr(g, '_current_user', None)
+    if user is None and 'user_id' in session:
+        user = db.session.get(User, session['user_id'])
+        g._current_user = user
+    return user
 
 
-def calculate_compatibility(user1, user2):
+@cache.cached(timeout=60, key_prefix='roommate_locations')
+def get_roommate_locations():
+    """
+    Get the unique preferred locations of all users for the filter dropdown.
+    
+    Only the preferred_locations column is fetched (SELECT DISTINCT), and the
+    result is cached for 60 seconds (and cleared with
+    cache.delete('roommate_locations') when a user's locations change).
+    
+    Returns:
+        Sorted tuple of unique location names
+    """
+    rows = db.session.query(User.preferred_locations)\
+                     .filter(User.preferred_locations.isnot(None))\
+                     .distinct().all()
+    unique_locations = set()
+    for (preferred_locations,) in rows:
+        unique_locations.update(loc.strip() for loc in preferred_locations.split(','))
+    unique_locations.discard('')
+    return tuple(sorted(unique_locations))
+
+
+@cache.cached(timeout=60, key_prefix='listing_locations')
+def get_listing_locations():
+    """
+    Get the unique listing locations for the filter dropdown.
+    
+    Cached for 60 seconds (and cleared with cache.delete('listing_locations')
+    when a listing is added or removed).
+    
+    Returns:
+        Tuple of unique location names
+    """
+    return tuple(loc for (loc,) in db.session.query(Listing.location).distinct().all())
+
+
+def split_names(value):
+    """
+    Split a comma-separated column into normalized names for matching.
+    
+    Args:
+        value: Comma-separated string (or None)
+    
+    Returns:
+        Set of lowercase, stripped, non-empty names
+    """
+    if not value:
+        return set()
+    return {name.strip().lower() for name in value.split(',')} - {''}
+
+
+def _link_names(connection, model, link_table, link_column, names_by_user):
+    """
+    Replace the link_table rows of some users with the given names.
+    
+    Names missing from the model's table (Tag or Location) are inserted first,
+    skipping any that another request has inserted in the meantime.
+    
+    Args:
+        connection: db.session or a Connection to run the statements on
+        model: Tag or Location
+        link_table: user_tags or user_locations
+        link_column: Name of the link_table column pointing at model
+        names_by_user: Dict of user id -> set of names
+    """
+    names = set().union(*names_by_user.values())
+    ids = {}
+    if names:
+        ids = dict(connection.execute(
+            select(model.name, model.id).where(model.name.in_(names))).all())
+        missing = names - ids.keys()
+        if missing:
+            # ON CONFLICT DO NOTHING: a concurrent request may have added the
+            # same name since the SELECT, so re-select the ids afterwards
+            connection.execute(
+                sqlite_insert(model).on_conflict_do_nothing(index_elements=['name']),
+                [{'name': name} for name in missing])
+            ids.update(connection.execute(
+                select(model.name, model.id).where(model.name.in_(missing))).all())
+    
+    connection.execute(delete(link_table).where(
+        link_table.c.user_id.in_(list(names_by_user))))
+    rows = [{'user_id': user_id, link_column: ids[name]}
+            for user_id, user_names in names_by_user.items()
+            for name in user_names]
+    if rows:
+        connection.execute(insert(link_table), rows)
+
+
+def sync_user_tags(users, connection=None):
+    """
+    Rebuild the user_tags and user_locations rows of the given users.
+    
+    Must be called (before committing) whenever a user's lifestyle or
+    preferred_locations column changes.
+    
+    Args:
+        users: Iterable of (user_id, lifestyle, preferred_locations) tuples
+        connection: Connection to use instead of db.session (optional)
+    """
+    connection = connection if connection is not None else db.session
+    users = list(users)
+    _link_names(connection, Tag, user_tags, 'tag_id',
+                {user_id: split_names(lifestyle) for user_id, lifestyle, _ in users})
+    _link_names(connection, Location, user_locations, 'location_id',
+                {user_id: split_names(locations) for user_id, _, locations in users})
+
+
+def backfill_user_tags():
+    """
+    One-time migration: fill the tag link tables for all existing users
+    from their comma-separated columns.
+    """
+    rows = db.session.execute(
+        select(User.id, User.lifestyle, User.preferred_locations)).all()
+    # Batches keep the IN (...) lists well under SQLite's parameter limit
+    for start in range(0, len(rows), 500):
+        sync_user_tags(rows[start:start + 500])
+    db.session.commit()
+
+
+@cache.cached(timeout=60, key_prefix='featured')
+def get_featured_listings():
+    """
+    Get the most recent active listings for the home page.
+    
+    Cached for 60 seconds (and cleared with cache.delete('featured') when
+    listings are added or removed). Plain dicts are returned instead of
+    Listing objects, which would be detached from their session once cached.
+    
+    Returns:
+        List of up to 6 listing dicts with the fields the home page shows
+    """
+    listings = Listing.query.filter_by(is_active=True)\
+                            .order_by(Listing.created_at.desc())\
+                            .limit(6).all()
+    return [{'id': listing.id, 'title': listing.title, 'location': listing.location,
+             'rent': listing.rent, 'room_type': listing.room_type,
+             'description': listing.description, 'image1': listing.image1}
+            for listing in listings]
+
+
+def get_match_sets(user):
+    """
+    Normalize a user's locations and lifestyle tags for compatibility matching.
+    
+    Uses the same normalization as split_names, so it agrees with the
+    user_tags/user_locations rows used by score_candidates.
+    
+    Args:
+        user: User object
+    
+    Returns:
+        Tuple of (locations, lifestyle) as lowercase frozensets
+    """
+    locations = frozenset(loc.lower() for loc in user.get_locations_list() if loc)
+    lifestyle = frozenset(tag.lower() for tag in user.get_lifestyle_list() if tag)
+    return locations, lifestyle
+
+
+def calculate_compatibility(user1, user2, sets1=None, sets2=None):
     """
     Calculate compatibility score between two users.
     
@@ -238,17 +546,19 @@ def calculate_compatibility(user1, user2):
     Args:
         user1: First user object
         user2: Second user object
+        sets1: Optional precomputed get_match_sets(user1), to avoid re-parsing
+               when user1 is scored against many users
+        sets2: Optional precomputed get_match_sets(user2)
     
     Returns:
         Compatibility score from 0 to 10
     """
     score = 0
+    locations1, lifestyle1 = sets1 if sets1 is not None else get_match_sets(user1)
+    locations2, lifestyle2 = sets2 if sets2 is not None else get_match_sets(user2)
     
     # Location Match (0 to 5 points)
     # Check if any preferred locations overlap
-    locations1 = set([loc.lower() for loc in user1.get_locations_list()])
-    locations2 = set([loc.lower() for loc in user2.get_locations_list()])
-    
     if locations1 and locations2:
         common_locations = locations1.intersection(locations2)
         if common_locations:
@@ -257,22 +567,15 @@ def calculate_compatibility(user1, user2):
             score += location_score
     
     # Budget Closeness (0 to 3 points)
-    # The closer the budgets, the higher the score
-    if user1.budget and user2.budget:
-        budget_diff = abs(user1.budget - user2.budget)
-        max_budget = max(user1.budget, user2.budget)
-        if max_budget > 0:
-            # Calculate percentage difference
-            diff_percent = budget_diff / max_budget
-            # Convert to score (0% diff = 3 points, 100% diff = 0 points)
-            budget_score = max(0, 3 * (1 - diff_percent))
-            score += budget_score
+    # The closer the budgets, the higher the score. A missing budget counts
+    # as 0, which is a 100% difference and so scores 0 points.
+    budget1, budget2 = user1.budget or 0, user2.budget or 0
+    max_budget = max(budget1, budget2)
+    # Convert percentage difference to score (0% diff = 3 points, 100% diff = 0 points)
+    score += 0 if max_budget <= 0 else max(0.0, 3 * (1 - abs(budget1 - budget2) / max_budget))
     
     # Lifestyle Match (0 to 2 points)
     # Check how many lifestyle preferences match
-    lifestyle1 = set([tag.lower() for tag in user1.get_lifestyle_list()])
-    lifestyle2 = set([tag.lower() for tag in user2.get_lifestyle_list()])
-    
     if lifestyle1 and lifestyle2:
         common_lifestyle = lifestyle1.intersection(lifestyle2)
         total_lifestyle = lifestyle1.union(lifestyle2)
@@ -285,6 +588,91 @@ def calculate_compatibility(user1, user2):
     return round(min(score, 10), 1)
 
 
+def _count_shared(link_table, link_column, user_id, user_ids):
+    """
+    Count shared link_table entries between one user and many others.
+    
+    Runs a single GROUP BY query over the link table.
+    
+    Args:
+        link_table: user_tags or user_locations
+        link_column: Name of the link_table column holding the tag/location id
+        user_id: ID of the user to compare against
+        user_ids: List of user IDs to count for
+    
+    Returns:
+        Tuple of NumPy arrays (shared, total) in the order of user_ids, where
+        shared is the number of entries in common with user_id and total is
+        the number of entries each user has
+    """
+    shared = np.zeros(len(user_ids), dtype=np.int32)
+    total = np.zeros(len(user_ids), dtype=np.int32)
+    if not user_ids:
+        return shared, total
+    
+    value = link_table.c[link_column]
+    mine = select(value).where(link_table.c.user_id == user_id)
+    rows = db.session.execute(
+        select(link_table.c.user_id,
+               func.sum(case((value.in_(mine), 1), else_=0)),
+               func.count())
+        .where(link_table.c.user_id.in_(user_ids))
+        .group_by(link_table.c.user_id)).all()
+    
+    position = {candidate_id: i for i, candidate_id in enumerate(user_ids)}
+    for candidate_id, shared_count, total_count in rows:
+        shared[position[candidate_id]] = shared_count
+        total[position[candidate_id]] = total_count
+    return shared, total
+
+
+def score_candidates(current_user, users):
+    """
+    Calculate compatibility scores between the current user and many users.
+    
+    Gives the same result as calling calculate_compatibility() for each user,
+    but location and lifestyle matches are counted in SQL from the
+    user_locations/user_tags tables and the arithmetic runs as NumPy array
+    operations over the whole pool, instead of one Python function call per
+    candidate. Keep the two in step when changing the scoring formula
+    (flask --app app check-scores compares them on the current database).
+    
+    Args:
+        current_user: The logged-in user object
+        users: List of candidate user objects
+    
+    Returns:
+        NumPy array of compatibility scores (0 to 10), in the order of users
+    """
+    user_ids = [user.id for user in users]
+    
+    # Location Match (0 to 5 points): 2.5 points per common location
+    common_locations, _ = _count_shared(user_locations, 'location_id',
+                                        current_user.id, user_ids)
+    location_score = np.minimum(common_locations * 2.5, 5)
+    
+    # Budget Closeness (0 to 3 points), a missing budget counts as 0.
+    # Budgets are any stored integer, so use float64 (never overflows or wraps).
+    my_budget = float(current_user.budget or 0)
+    budgets = np.array([user.budget or 0 for user in users], dtype=np.float64)
+    max_budget = np.maximum(budgets, my_budget)
+    diff_percent = np.abs(budgets - my_budget) / np.maximum(max_budget, 1)
+    budget_score = np.where(max_budget > 0, np.clip(3 * (1 - diff_percent), 0, 3), 0)
+    
+    # Lifestyle Match (0 to 2 points): Jaccard similarity of the tag sets
+    common_lifestyle, candidate_lifestyle = _count_shared(user_tags, 'tag_id',
+                                                          current_user.id, user_ids)
+    my_lifestyle = len(split_names(current_user.lifestyle))
+    total_lifestyle = my_lifestyle + candidate_lifestyle - common_lifestyle
+    lifestyle_score = np.where(common_lifestyle > 0,
+                               common_lifestyle / np.maximum(total_lifestyle, 1) * 2, 0)
+    
+    # Round to 1 decimal place and ensure max is 10
+    # (built-in round(), as np.round can differ by 0.1 on halfway values)
+    scores = np.minimum(location_score + budget_score + lifestyle_score, 10)
+    return np.array([round(score, 1) for score in scores.tolist()])
+
+
 # =============================================================================
 # CONTEXT PROCESSOR - Makes user available in all templates
 # =============================================================================
@@ -306,10 +694,7 @@ def home():
     Shows featured listings and call-to-action buttons.
     """
     # Get a few recent listings to display on home page
-    featured_listings = Listing.query.filter_by(is_active=True)\
-                               .order_by(Listing.created_at.desc())\
-                               .limit(6).all()
-    return render_template('home.html', listings=featured_listings)
+    return render_template('home.html', listings=get_featured_listings())
 
 
 @app.route('/register', methods=['GET', 'POST'])
@@ -370,7 +755,10 @@ def register():
         user.set_password(password)
         
         db.session.add(user)
+        db.session.flush()  # Assigns user.id for the tag links
+        sync_user_tags([(user.id, user.lifestyle, user.preferred_locations)])
         db.session.commit()
+        cache.delete('roommate_locations')
         
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
@@ -457,13 +845,46 @@ def profile():
                 if saved_filename:
                     user.profile_image = saved_filename
         
+        sync_user_tags([(user.id, user.lifestyle, user.preferred_locations)])
         db.session.commit()
+        cache.delete('roommate_locations')
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('profile'))
     
     return render_template('profile.html', user=user)
 
 
+@app.route('/profile/image', methods=['PUT'])
+@login_required
+def upload_profile_image():
+    """
+    Replace the profile picture with the raw image sent as the request body.
+    
+    The body is the image itself (e.g. Content-Type: image/jpeg), not a
+    multipart form, so it skips the form parser and is copied in chunks
+    to a temporary file before being processed like any other upload.
+    """
+    user = get_current_user()
+    extension = mimetypes.guess_extension(request.mimetype) or ''
+    
+    with tempfile.NamedTemporaryFile() as temp_file:
+        while True:
+            chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            temp_file.write(chunk)
+        
+        file = FileStorage(stream=temp_file, filename=f'upload{extension}')
+        saved_filename = save_image(file, prefix='profile')
+    
+    if not saved_filename:
+        return jsonify(error='Please upload a PNG, JPG, GIF or WEBP image.'), 400
+    
+    user.profile_image = saved_filename
+    db.session.commit()
+    return jsonify(profile_image=saved_filename)
+
+
 # =============================================================================
 # ROUTES - LISTINGS
 # =============================================================================
@@ -520,6 +941,8 @@ def post_listing():
         
         db.session.add(listing)
         db.session.commit()
+        cache.delete('listing_locations')
+        cache.delete('featured')
         
         flash('Listing created successfully!', 'success')
         return redirect(url_for('browse_listings'))
@@ -543,7 +966,12 @@ def browse_listings():
     query = Listing.query.filter_by(is_active=True)
     
     if location:
-        query = query.filter(Listing.location.ilike(f'%{location}%'))
+        if location in get_listing_locations():
+            # Picked from the dropdown: exact (case-insensitive) match, which
+            # can use the lower(location) index instead of scanning every row
+            query = query.filter(func.lower(Listing.location) == location.lower())
+        else:
+            query = query.filter(Listing.location.ilike(f'%{location}%'))
     
     if min_rent:
         query = query.filter(Listing.rent >= min_rent)
@@ -554,15 +982,14 @@ def browse_listings():
     if room_type:
         query = query.filter(Listing.room_type == room_type)
     
-    listings = query.order_by(Listing.created_at.desc()).all()
-    
-    # Get unique locations for filter dropdown
-    all_locations = db.session.query(Listing.location).distinct().all()
-    locations_list = [loc[0] for loc in all_locations]
+    page = request.args.get('page', 1, type=int)
+    pagination = query.order_by(Listing.created_at.desc())\
+                      .paginate(page=page, per_page=BROWSE_PAGE_SIZE, error_out=False)
     
     return render_template('browse_listings.html', 
-                          listings=listings, 
-                          locations=locations_list,
+                          listings=pagination.items, 
+                          pagination=pagination,
+                          locations=get_listing_locations(),
                           filters={'location': location, 'min_rent': min_rent, 
                                   'max_rent': max_rent, 'room_type': room_type})
 
@@ -570,7 +997,8 @@ def browse_listings():
 @app.route('/listing/<int:listing_id>')
 def view_listing(listing_id):
     """View details of a specific listing."""
-    listing = Listing.query.get_or_404(listing_id)
+    # The page shows the owner's details, so load them in the same query
+    listing = Listing.query.options(joinedload(Listing.owner)).get_or_404(listing_id)
     return render_template('view_listing.html', listing=listing)
 
 
@@ -587,6 +1015,8 @@ def delete_listing(listing_id):
     
     db.session.delete(listing)
     db.session.commit()
+    cache.delete('listing_locations')
+    cache.delete('featured')
     flash('Listing deleted successfully.', 'success')
     return redirect(url_for('dashboard'))
 
@@ -607,7 +1037,11 @@ def browse_roommates():
     max_budget = request.args.get('max_budget', type=int)
     
     # Build query (exclude current user if logged in)
-    query = User.query
+    # Only load the columns the roommate cards and scoring use (no bio,
+    # password hash, etc.)
+    query = User.query.options(load_only(
+        User.id, User.name, User.age, User.gender, User.budget,
+        User.preferred_locations, User.lifestyle, User.profile_image))
     
     current_user = get_current_user()
     if current_user:
@@ -622,32 +1056,36 @@ def browse_roommates():
     if max_budget:
         query = query.filter(User.budget <= max_budget)
     
-    users = query.order_by(User.created_at.desc()).all()
+    # Order in SQL so only one page is loaded and scored: closest budget
+    # first when logged in (a cheap stand-in for compatibility), newest first
+    # otherwise. Each page is then sorted by its real compatibility scores.
+    by_budget = bool(current_user and current_user.budget)
+    if by_budget:
+        budget_distance = func.abs(User.budget - current_user.budget)
+        query = query.order_by(budget_distance.nulls_last(), User.created_at.desc())
+    else:
+        query = query.order_by(User.created_at.desc())
     
-    # Calculate compatibility scores for each user
-    roommates_with_scores = []
-    for user in users:
-        score = 0
-        if current_user:
-            score = calculate_compatibility(current_user, user)
-        roommates_with_scores.append({
-            'user': user,
-            'score': score
-        })
+    page = request.args.get('page', 1, type=int)
+    pagination = query.paginate(page=page, per_page=BROWSE_PAGE_SIZE, error_out=False)
+    users = pagination.items
     
-    # Sort by compatibility score (highest first) if logged in
+    # Calculate compatibility scores for all users in one vectorized pass,
+    # then sort by score (highest first). argsort does the comparisons in C;
+    # 'stable' keeps the SQL order for equal scores, like list.sort() did.
     if current_user:
-        roommates_with_scores.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Get unique locations for filter dropdown
-    all_users_locations = []
-    for u in User.query.all():
-        all_users_locations.extend(u.get_locations_list())
-    unique_locations = list(set(all_users_locations))
+        scores = score_candidates(current_user, users)
+        order = np.argsort(-scores, kind='stable')
+        roommates_with_scores = [{'user': users[i], 'score': float(scores[i])}
+                                 for i in order]
+    else:
+        roommates_with_scores = [{'user': user, 'score': 0} for user in users]
     
     return render_template('browse_roommates.html', 
                           roommates=roommates_with_scores,
-                          locations=unique_locations,
+                          pagination=pagination,
+                          by_budget=by_budget,
+                          locations=get_roommate_locations(),
                           filters={'location': location, 'min_budget': min_budget, 
                                   'max_budget': max_budget})
 
@@ -670,197 +1108,142 @@ def view_roommate(user_id):
 # INITIALIZE DATABASE & CREATE SAMPLE DATA
 # =============================================================================
 
+# Precomputed generate_password_hash('password123'), shared by all sample
+# users, so seeding doesn't spend seconds running the password hash
+SAMPLE_PASSWORD_HASH = 'scrypt:32768:8:1$Nue7cJBoygNpPk6t$61ebee1a5efd81c2730e5a40399151918984002db9296f90c68bef54e1021c83a28e965d689179ca162d4c8075c65635d1ee659be512791f52f32c9de0ed3dc7'
+
+# Sample users and listings, kept out of the module so they are only loaded
+# when the database actually gets seeded
+SAMPLE_DATA_FILE = Path('fixtures', 'seed.json')
+
+
 def create_sample_data():
     """
     Create sample/dummy data to populate the application.
     This makes the UI look filled and ready for demonstration.
+    
+    Runs on its own short-lived engine with no connection pool (NullPool), so
+    the connection is fully closed afterwards instead of sitting idle in the
+    app's pool.
+    
+    Once the database is known to have data, an instance/.seeded file is
+    written so later starts skip the database check entirely. Delete that
+    file to seed again after resetting the database.
     """
-    # Check if data already exists
-    if User.query.first():
+    sentinel = Path(app.instance_path, '.seeded')
+    if sentinel.exists():
         return
     
-    print("Creating sample data...")
+    seed_engine = create_engine(db.engine.url, poolclass=NullPool)
+    try:
+        # One transaction with a single COMMIT when the block ends
+        with seed_engine.begin() as connection:
+            created = _insert_sample_data(connection)
+    finally:
+        seed_engine.dispose()
     
-    # Sample users with diverse profiles
-    sample_users = [
-        {
-            'email': 'alex@example.com',
-            'password': 'password123',
-            'name': 'Alex Johnson',
-            'age': 25,
-            'gender': 'Male',
-            'budget': 800,
-            'preferred_locations': 'Mumbai, Pune, Bangalore',
-            'lifestyle': 'Non-smoker, Early riser, Gym enthusiast, Clean',
-            'bio': 'Software developer looking for a quiet and clean living space. I work from home most days and enjoy cooking on weekends.'
-        },
-        {
-            'email': 'priya@example.com',
-            'password': 'password123',
-            'name': 'Priya Sharma',
-            'age': 23,
-            'gender': 'Female',
-            'budget': 600,
-            'preferred_locations': 'Delhi, Noida, Gurgaon',
-            'lifestyle': 'Non-smoker, Night owl, Pet-friendly, Vegetarian',
-            'bio': 'Graduate student pursuing MBA. Looking for a friendly roommate who respects privacy.'
-        },
-        {
-            'email': 'rahul@example.com',
-            'password': 'password123',
-            'name': 'Rahul Patel',
-            'age': 28,
-            'gender': 'Male',
-            'budget': 1000,
-            'preferred_locations': 'Bangalore, Hyderabad',
-            'lifestyle': 'Social, Foodie, Movie buff, Clean',
-            'bio': 'Working professional in the tech industry. Love hosting small gatherings and trying new restaurants.'
-        },
-        {
-            'email': 'sneha@example.com',
-            'password': 'password123',
-            'name': 'Sneha Reddy',
-            'age': 26,
-            'gender': 'Female',
-            'budget': 750,
-            'preferred_locations': 'Hyderabad, Chennai, Bangalore',
-            'lifestyle': 'Non-smoker, Yoga lover, Early riser, Minimalist',
-            'bio': 'Healthcare professional working in a hospital. Looking for a peaceful environment to relax after work.'
-        },
-        {
-            'email': 'amit@example.com',
-            'password': 'password123',
-            'name': 'Amit Kumar',
-            'age': 24,
-            'gender': 'Male',
-            'budget': 500,
-            'preferred_locations': 'Pune, Mumbai',
-            'lifestyle': 'Student, Budget-friendly, Non-smoker, Social',
-            'bio': 'Final year engineering student looking for affordable accommodation near my college.'
-        },
-        {
-            'email': 'meera@example.com',
-            'password': 'password123',
-            'name': 'Meera Nair',
-            'age': 27,
-            'gender': 'Female',
-            'budget': 900,
-            'preferred_locations': 'Mumbai, Pune',
-            'lifestyle': 'Working professional, Clean, Organized, Pet-friendly',
-            'bio': 'Marketing professional who loves reading and gardening. Looking for a mature and responsible roommate.'
-        }
-    ]
-    
-    # Create users
-    created_users = []
-    for user_data in sample_users:
-        user = User(
-            email=user_data['email'],
-            name=user_data['name'],
-            age=user_data['age'],
-            gender=user_data['gender'],
-            budget=user_data['budget'],
-            preferred_locations=user_data['preferred_locations'],
-            lifestyle=user_data['lifestyle'],
-            bio=user_data['bio']
-        )
-        user.set_password(user_data['password'])
-        db.session.add(user)
-        created_users.append(user)
+    sentinel.parent.mkdir(parents=True, exist_ok=True)
+    sentinel.touch()
+    if created:
+        cache.delete('roommate_locations')
+        cache.delete('listing_locations')
+        cache.delete('featured')
+        print("Sample data created successfully!")
+
+
+def _insert_sample_data(connection):
+    """
+    Insert the sample users and listings unless the database has users.
     
-    db.session.commit()
+    Args:
+        connection: Connection (inside a transaction) to insert with
     
-    # Sample listings
-    sample_listings = [
-        {
-            'user_index': 0,
-            'title': 'Cozy Private Room in Bandra',
-            'location': 'Mumbai',
-            'rent': 12000,
-            'room_type': 'Private Room',
-            'description': 'Spacious private room in a well-maintained 2BHK apartment. Close to Bandra station and local markets. Fully furnished with AC, bed, wardrobe, and study table. Common areas are shared. Flat has a modern kitchen and balcony.',
-            'amenities': 'WiFi, AC, Washing Machine, Kitchen, Balcony, 24/7 Water'
-        },
-        {
-            'user_index': 1,
-            'title': 'Modern Shared Room in Sector 18',
-            'location': 'Noida',
-            'rent': 6000,
-            'room_type': 'Shared Room',
-            'description': 'Sharing basis room in a fully furnished flat. Great for students and young professionals. Near metro station and malls. Looking for a female roommate.',
-            'amenities': 'WiFi, AC, Metro nearby, Gym access, Security'
-        },
-        {
-            'user_index': 2,
-            'title': 'Entire 1BHK in Koramangala',
-            'location': 'Bangalore',
-            'rent': 22000,
-            'room_type': 'Entire Flat',
-            'description': 'Beautiful 1BHK apartment in the heart of Koramangala. Walking distance to cafes, restaurants, and tech parks. Modern interiors with wooden flooring. Suitable for couples or single occupancy.',
-            'amenities': 'WiFi, AC, Parking, Gym, Swimming Pool, Power Backup'
-        },
-        {
-            'user_index': 3,
-            'title': 'Peaceful Room in Gachibowli',
-            'location': 'Hyderabad',
-            'rent': 9000,
-            'room_type': 'Private Room',
-            'description': 'Quiet private room in a 3BHK apartment near IT hub. Ideal for working professionals. Fully furnished with all amenities. Vegetarian household preferred.',
-            'amenities': 'WiFi, AC, Kitchen, Parking, Security, Housekeeping'
-        },
-        {
-            'user_index': 4,
-            'title': 'Budget-Friendly Shared Room',
-            'location': 'Pune',
-            'rent': 4500,
-            'room_type': 'Shared Room',
-            'description': 'Affordable shared accommodation near Hinjewadi IT Park. Best for students and freshers. Includes all basic amenities. Friendly flatmates and clean environment.',
-            'amenities': 'WiFi, Common Kitchen, Water Purifier, Laundry'
-        },
-        {
-            'user_index': 5,
-            'title': 'Luxury Studio Apartment',
-            'location': 'Mumbai',
-            'rent': 28000,
-            'room_type': 'Entire Flat',
-            'description': 'Premium studio apartment in Powai with lake view. Fully furnished with high-end appliances. Gated society with all modern amenities. Perfect for professionals seeking comfort and convenience.',
-            'amenities': 'WiFi, AC, Gym, Pool, Clubhouse, 24/7 Security, Covered Parking'
-        },
-        {
-            'user_index': 0,
-            'title': 'Furnished Room in Andheri',
-            'location': 'Mumbai',
-            'rent': 10000,
-            'room_type': 'Private Room',
-            'description': 'Well-ventilated room in Andheri East, close to metro and railway station. Suitable for working professionals. Flat has 3 rooms with 2 other friendly flatmates.',
-            'amenities': 'WiFi, AC, Kitchen, Washing Machine'
-        },
-        {
-            'user_index': 2,
-            'title': 'Modern Flat in Whitefield',
-            'location': 'Bangalore',
-            'rent': 18000,
-            'room_type': 'Entire Flat',
-            'description': 'Contemporary 1BHK in a premium gated community in Whitefield. Close to IT parks and shopping malls. Comes with modular kitchen and spacious balcony.',
-            'amenities': 'WiFi, AC, Gym, Clubhouse, Parking, Power Backup'
-        }
-    ]
-    
-    # Create listings
-    for listing_data in sample_listings:
-        listing = Listing(
-            user_id=created_users[listing_data['user_index']].id,
-            title=listing_data['title'],
-            location=listing_data['location'],
-            rent=listing_data['rent'],
-            room_type=listing_data['room_type'],
-            description=listing_data['description'],
-            amenities=listing_data['amenities']
-        )
-        db.session.add(listing)
+    Returns:
+        True if sample data was inserted, False if data already existed
+    """
+    # Check if data already exists (SELECT 1 FROM user LIMIT 1 - no need to
+    # load a whole User row just to see that one exists)
+    if connection.execute(select(literal(1)).select_from(User).limit(1)).scalar():
+        return False
     
-    db.session.commit()
-    print("Sample data created successfully!")
+    print("Creating sample data...")
+    # The fixtures are only read (one file read, one C-level JSON parse) when
+    # seeding actually happens. Each table is stored as column names plus
+    # rows of values in that order.
+    fixtures = json.loads(Path(app.root_path, SAMPLE_DATA_FILE).read_bytes())
+    users, listings = fixtures['users'], fixtures['listings']
+    
+    # The bulk INSERTs run straight away, so no intermediate commit or flush
+    # is needed for the listings to reference the new user ids.
+    
+    # Create users with one bulk INSERT (no per-object unit-of-work cost)
+    user_mappings = [dict(zip(users['columns'], row), password_hash=SAMPLE_PASSWORD_HASH)
+                     for row in users['rows']]
+    # RETURNING gives back the new ids in the same round trip, in the same
+    # order as user_mappings (sort_by_parameter_order), as a plain list of ints
+    user_ids = connection.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        user_mappings).scalars().all()
+    sync_user_tags(((user_id, mapping['lifestyle'], mapping['preferred_locations'])
+                    for user_id, mapping in zip(user_ids, user_mappings)),
+                   connection=connection)
+    
+    # Create listings with one bulk INSERT (the first column is user_index,
+    # a position in the users rows)
+    listing_mappings = [dict(zip(listings['columns'][1:], values),
+                             user_id=user_ids[user_index])
+                        for user_index, *values in listings['rows']]
+    connection.execute(insert(Listing), listing_mappings)
+    return True
+
+
+def init_db():
+    """
+    Create or upgrade the database schema, and fill the tag link tables.
+    Safe to run again on an existing database.
+    """
+    if inspect(db.engine).has_table('alembic_version'):
+        # Already managed by migrations: apply any new ones
+        upgrade()
+    else:
+        # New database, or one from before migrations were added: bring it
+        # up to the current models, then mark it as up to date
+        db.create_all()
+        # create_all() skips tables that already exist, so add new indexes too
+        with db.engine.begin() as connection:
+            for index in Listing.__table__.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+        stamp()
+    # Fill the tag link tables for users created before they existed
+    if db.session.execute(select(user_tags).limit(1)).first() is None and \
+       db.session.execute(select(user_locations).limit(1)).first() is None:
+        backfill_user_tags()
+
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Set up the database (run once per deployment: flask --app app init-db)."""
+    init_db()
+    print("Database initialized.")
+
+
+@app.cli.command('check-scores')
+def check_scores_command():
+    """Check that score_candidates() matches calculate_compatibility() for every pair of users."""
+    users = User.query.all()
+    mismatches = 0
+    for current_user in users:
+        others = [user for user in users if user.id != current_user.id]
+        sets = get_match_sets(current_user)
+        scores = score_candidates(current_user, others).tolist()
+        for user, score in zip(others, scores):
+            expected = calculate_compatibility(current_user, user, sets)
+            if score != expected:
+                mismatches += 1
+                print(f"{current_user.email} -> {user.email}: {score} (expected {expected})")
+    if mismatches:
+        raise click.ClickException(f"{mismatches} score(s) differ from calculate_compatibility().")
+    print(f"Scores match for {len(users)} users.")
 
 
 # =============================================================================
@@ -868,10 +1251,16 @@ def create_sample_data():
 # =============================================================================
 
 if __name__ == '__main__':
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        create_sample_data()
+    # Sample data is opt-in (SEED_SAMPLE_DATA=1). The reloader's child process
+    # re-runs this block with WERKZEUG_RUN_MAIN set, so skip it there.
+    if os.environ.get('SEED_SAMPLE_DATA') == '1' and \
+       os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        with app.app_context():
+            create_sample_data()
     
-    # Run the Flask development server
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Run the Flask development server. The debugger and auto-reloader are
+    # only turned on with FLASK_DEBUG=1 (the reloader re-imports the whole
+    # app in a child process and keeps polling files for changes).
+    # In production, use a WSGI server instead: gunicorn -w 4 app:app
+    debug = os.environ.get('FLASK_DEBUG') == '1'
+    app.run(host='0.0.0.0', port=5000, debug=debug)